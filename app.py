@@ -1,46 +1,147 @@
-from flask import Flask, render_template, request
+from flask import Flask, Response, g, jsonify, render_template, request
 import json
+import os
+import time
+
+import metrics
 
 app = Flask(__name__)
 
+# Per-request profiling via ?profile=cprofile or ?profile=pyinstrument, off unless enabled
+app.config['PROFILING_ENABLED'] = os.getenv('CSR_PROFILING', '') == '1'
+
+REQUEST_SECONDS = metrics.histogram(
+    'ngo_app_request_seconds', 'Total time spent serving a web request', ['endpoint'])
+STAGE_SECONDS = metrics.histogram(
+    'ngo_app_stage_seconds', 'Time spent in each stage of the index page', ['stage'])
+RESULTS = metrics.histogram(
+    'ngo_app_results', 'Number of NGOs rendered per index request', buckets=(0, 1, 10, 50, 100, 250, 500, 1000, 5000))
+
+SIMILAR_TOP_K = 20
+SUGGEST_LIMIT = 10
+DATA_PATH = 'data/ngo.json'
+
 def load_ngo_data():
-    with open('data/ngo.json', 'r') as f:
+    with open(DATA_PATH, 'r') as f:
         data = json.load(f)
     return data
 
+def operates_in(ngo, district):
+    """Whether district (already normalized) is one of the NGO's operational districts"""
+    from ingest import parse_districts
+    from suggest import normalize
+
+    areas = (ngo.get('Key Issues') or {}).get('Operational Area-District')
+    return any(normalize(d) == district for _, d in parse_districts(areas))
+
+def find_similar_ngos(ngos, text, district='', top_k=SIMILAR_TOP_K):
+    """Return the NGOs most similar to text, best first, or None if the index has not been built"""
+    from semantic_index import get_index
+
+    index = get_index()
+    if index is None:
+        return None
+    by_id = {ngo.get('Unique Id of VO/NGO'): ngo for ngo in ngos}
+    similar = []
+    # Over-fetch so that the district filter still leaves top_k results
+    for ngo_id, score in index.query(text, top_k=top_k * 5 if district else top_k):
+        ngo = by_id.get(ngo_id)
+        if ngo and (not district or operates_in(ngo, district)):
+            similar.append(ngo)
+    return similar[:top_k]
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    g.profiler = None
+    mode = request.args.get('profile')
+    if not mode or not app.config['PROFILING_ENABLED']:
+        return
+    if mode == 'pyinstrument':
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            app.logger.warning("pyinstrument is not installed, falling back to cProfile")
+        else:
+            g.profiler = ('pyinstrument', Profiler())
+            g.profiler[1].start()
+            return
+    import cProfile
+    g.profiler = ('cprofile', cProfile.Profile())
+    g.profiler[1].enable()
+
+@app.after_request
+def finish_request_timer(response):
+    if g.get('profiler'):
+        kind, profiler = g.profiler
+        if kind == 'pyinstrument':
+            profiler.stop()
+            response = Response(profiler.output_html(), mimetype='text/html')
+        else:
+            import io
+            import pstats
+            profiler.disable()
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(40)
+            response = Response(out.getvalue(), mimetype='text/plain')
+    if 'request_start' in g:
+        REQUEST_SECONDS.observe(time.perf_counter() - g.request_start,
+                                endpoint=request.endpoint or 'unknown')
+    return response
+
+@app.route('/suggest', methods=['GET'])
+def suggest():
+    from suggest import KINDS, get_suggest_index
+
+    kinds = tuple(k for k in request.args.get('kind', ','.join(KINDS)).split(',') if k in KINDS)
+    limit = min(request.args.get('limit', SUGGEST_LIMIT, type=int), 50)
+    with STAGE_SECONDS.time(stage='suggest'):
+        index = get_suggest_index(DATA_PATH, load_ngo_data)
+        return jsonify(index.suggest(request.args.get('q', ''), limit=limit, kinds=kinds))
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
 @app.route('/', methods=['GET'])
 def index():
-    ngos = load_ngo_data()
+    from suggest import normalize
+
+    with STAGE_SECONDS.time(stage='load'):
+        ngos = load_ngo_data()
     search_query = request.args.get('search', '').lower()
-    district = request.args.get('district', '')
-    
-    # Get unique districts for filter dropdown
-    districts = set()
-    for ngo in ngos:
-        if 'Key Issues' in ngo and 'Operational Area-District' in ngo['Key Issues']:
-            districts_str = ngo['Key Issues']['Operational Area-District']
-            if districts_str and districts_str != "Not Available":
-                for d in districts_str.split(','):
-                    if '->' in d:
-                        state, dist = d.split('->')
-                        districts.add(dist.strip())
+    # Districts are typed free-form, so compare normalized names
+    district = normalize(request.args.get('district', ''))
+    similar = request.args.get('mode') == 'similar' and bool(search_query)
+    notice = None
+
+    # Rank NGOs by semantic similarity to the search text
+    if similar:
+        with STAGE_SECONDS.time(stage='similar'):
+            similar_ngos = find_similar_ngos(ngos, search_query, district)
+        if similar_ngos is None:
+            notice = "Similar work search is not available yet, showing keyword matches instead."
+            similar = False
+        else:
+            ngos = similar_ngos
 
     # Filter NGOs based on search and district
-    if search_query or district:
-        filtered_ngos = []
-        for ngo in ngos:
-            name = ngo.get('name', '').lower()
-            achievements = ngo.get('Details of Achievements', '').lower()
-            ngo_district = ngo.get('Key Issues', {}).get('Operational Area-District', '')
-            
-            if search_query in name or search_query in achievements:
-                if district and district in ngo_district:
-                    filtered_ngos.append(ngo)
-                elif not district:
-                    filtered_ngos.append(ngo)
-        ngos = filtered_ngos
-
-    return render_template('index.html', ngos=ngos, districts=sorted(districts))
+    with STAGE_SECONDS.time(stage='filter'):
+        if not similar and (search_query or district):
+            filtered_ngos = []
+            for ngo in ngos:
+                name = ngo.get('name', '').lower()
+                achievements = ngo.get('Details of Achievements', '').lower()
+                ngo_id = ngo.get('Unique Id of VO/NGO', '').lower()
+
+                if search_query in name or search_query in achievements or search_query in ngo_id:
+                    if not district or operates_in(ngo, district):
+                        filtered_ngos.append(ngo)
+            ngos = filtered_ngos
+
+    RESULTS.observe(len(ngos))
+    with STAGE_SECONDS.time(stage='render'):
+        return render_template('index.html', ngos=ngos, notice=notice)
 
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,156 @@
+"""Content-addressed archive of every fetched page.
+
+Response bodies are stored once per SHA-256 digest as independent zstd
+frames appended to rolling segment files (archive/segments/seg-000001.zst).
+A SQLite index records where each body lives and every fetch that produced
+it (URL, method, request payload, status, time), so parsers can be re-run
+over the archive with `python cli.py reparse` instead of re-crawling.
+
+Writes take an exclusive SQLite transaction around the segment append, so
+several scraper processes can share one archive; within a process a lock
+serializes threads sharing the connection.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger('csr_matchmaker')
+
+DEFAULT_ARCHIVE_DIR = os.getenv('CSR_ARCHIVE_DIR', './archive')
+SEGMENT_MAX_BYTES = 256 * 1024 * 1024
+COMPRESSION_LEVEL = 10
+
+
+class PageArchive:
+    """Deduplicated, zstd-compressed store of raw response bodies"""
+
+    def __init__(self, root=DEFAULT_ARCHIVE_DIR):
+        import zstandard
+
+        self.root = root
+        self.segment_dir = os.path.join(root, 'segments')
+        os.makedirs(self.segment_dir, exist_ok=True)
+        self._compressor = zstandard.ZstdCompressor(level=COMPRESSION_LEVEL)
+        self._decompressor = zstandard.ZstdDecompressor()
+        self.conn = sqlite3.connect(os.path.join(root, 'index.db'), timeout=60,
+                                    isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        self.conn.executescript('''
+        CREATE TABLE IF NOT EXISTS blobs (
+            sha256 TEXT PRIMARY KEY,
+            segment TEXT,
+            offset INTEGER,
+            length INTEGER,
+            raw_length INTEGER
+        );
+        CREATE TABLE IF NOT EXISTS fetches (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            url TEXT,
+            method TEXT,
+            request_data TEXT,
+            status INTEGER,
+            content_type TEXT,
+            fetched_at REAL,
+            sha256 TEXT REFERENCES blobs (sha256)
+        );
+        CREATE INDEX IF NOT EXISTS idx_fetches_url ON fetches (url, fetched_at);
+        ''')
+
+    def _current_segment(self, incoming):
+        segments = sorted(f for f in os.listdir(self.segment_dir) if f.endswith('.zst'))
+        if segments:
+            path = os.path.join(self.segment_dir, segments[-1])
+            if os.path.getsize(path) + incoming <= SEGMENT_MAX_BYTES:
+                return segments[-1]
+        return f"seg-{len(segments) + 1:06d}.zst"
+
+    def store(self, url, body, status=200, content_type=None, method='GET', request_data=None, fetched_at=None):
+        """Archive one fetch; the body is written only if its digest is new. Returns the digest."""
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        if request_data is not None and not isinstance(request_data, str):
+            request_data = json.dumps(request_data, sort_keys=True, default=str)
+        digest = hashlib.sha256(body).hexdigest()
+
+        with self._lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                known = self.conn.execute('SELECT 1 FROM blobs WHERE sha256 = ?', (digest,)).fetchone()
+                if not known:
+                    frame = self._compressor.compress(body)
+                    segment = self._current_segment(len(frame))
+                    with open(os.path.join(self.segment_dir, segment), 'ab') as f:
+                        offset = f.tell()
+                        f.write(frame)
+                    self.conn.execute('INSERT INTO blobs VALUES (?, ?, ?, ?, ?)',
+                                      (digest, segment, offset, len(frame), len(body)))
+                self.conn.execute('''
+                INSERT INTO fetches (url, method, request_data, status, content_type, fetched_at, sha256)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (url, method.upper(), request_data, status, content_type, fetched_at or time.time(), digest))
+                self.conn.execute('COMMIT')
+            except BaseException:
+                self.conn.execute('ROLLBACK')
+                raise
+        return digest
+
+    def store_response(self, response, request_data=None):
+        """Archive a requests.Response"""
+        return self.store(response.url, response.content, response.status_code,
+                          response.headers.get('Content-Type'), response.request.method, request_data)
+
+    def get(self, digest):
+        """Decompressed body for a digest"""
+        with self._lock:
+            row = self.conn.execute('SELECT segment, offset, length FROM blobs WHERE sha256 = ?', (digest,)).fetchone()
+            if row is None:
+                raise KeyError(digest)
+            segment, offset, length = row
+            with open(os.path.join(self.segment_dir, segment), 'rb') as f:
+                f.seek(offset)
+                return self._decompressor.decompress(f.read(length))
+
+    def fetches(self, url_prefix='', latest_only=True):
+        """Fetch records (dicts) for URLs starting with url_prefix, newest per URL and payload by default"""
+        if latest_only:
+            # SQLite returns the bare columns of the row holding MAX(fetched_at)
+            query = '''
+            SELECT url, method, request_data, status, content_type, MAX(fetched_at) AS fetched_at, sha256
+            FROM fetches WHERE url >= ? AND url < ?
+            GROUP BY url, method, request_data ORDER BY url
+            '''
+        else:
+            query = '''
+            SELECT url, method, request_data, status, content_type, fetched_at, sha256
+            FROM fetches WHERE url >= ? AND url < ? ORDER BY url, fetched_at
+            '''
+        with self._lock:
+            cursor = self.conn.execute(query, (url_prefix, url_prefix + '\U0010ffff'))
+            columns = [desc[0] for desc in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor]
+
+    def stats(self):
+        with self._lock:
+            fetches, = self.conn.execute('SELECT COUNT(*) FROM fetches').fetchone()
+            blobs, stored, raw = self.conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(length), 0), COALESCE(SUM(raw_length), 0) FROM blobs').fetchone()
+        return {'fetches': fetches, 'bodies': blobs, 'stored_bytes': stored, 'raw_bytes': raw}
+
+
+_archives = {}
+
+
+def get_archive(root=DEFAULT_ARCHIVE_DIR):
+    """Process-wide archive, or None (with a warning) if zstandard is not installed"""
+    key = (os.getpid(), root)
+    if key not in _archives:
+        try:
+            _archives[key] = PageArchive(root)
+        except ImportError:
+            logger.warning("zstandard is not installed, fetched pages will not be archived")
+            _archives[key] = None
+    return _archives[key]
@@ -0,0 +1,284 @@
+"""Batch matching of many companies against every NGO.
+
+The NGO side is encoded once into a numeric matrix (state/district codes,
+aspirational flag, SDG membership, compliance) that lives in shared memory,
+so worker processes attach to it instead of each receiving a pickled copy.
+Companies are sharded across a process pool; each worker scores its shard
+with vectorized numpy using the same formula as
+MatchingEngine.calculate_match_score and builds the top-k match rows per
+company, so the parent only streams them into the matches table with bulk
+inserts and reports throughput as it goes.
+
+    python cli.py match-all --workers 8 --top-k 20
+"""
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import features
+import metrics
+from matching import COMPLIANCE_BONUS, PROXIMITY_WEIGHT, SDG_WEIGHT
+
+logger = logging.getLogger('csr_matchmaker')
+
+COMPANIES_MATCHED = metrics.counter(
+    'csr_batch_companies_total', 'Companies scored by the batch matching job')
+CHUNK_SECONDS = metrics.histogram(
+    'csr_batch_chunk_seconds', 'Time a worker spends scoring one chunk of companies')
+
+N_SDGS = 17
+
+
+def _sdg_columns(sdgs):
+    """Zero-based SDG columns for a list of SDG numbers, ignoring anything outside 1-17"""
+    columns = set()
+    for sdg in sdgs or []:
+        try:
+            sdg = int(sdg)
+        except (TypeError, ValueError):
+            continue
+        if 1 <= sdg <= N_SDGS:
+            columns.add(sdg - 1)
+    return sorted(columns)
+
+
+class NgoMatrix:
+    """Column arrays describing every NGO, optionally backed by shared memory"""
+
+    FIELDS = ('state', 'district', 'aspirational', 'compliant', 'sdgs')
+
+    def __init__(self, arrays, darpan_ids=None, states=None, districts=None, issue_codes=None):
+        self.arrays = arrays
+        self.darpan_ids = darpan_ids
+        self.states = states or {}
+        self.districts = districts or {}
+        self.issue_codes = issue_codes
+        self._shm = None
+
+    def __len__(self):
+        return len(self.arrays['state'])
+
+    def __getattr__(self, name):
+        if name in NgoMatrix.FIELDS:
+            return self.arrays[name]
+        raise AttributeError(name)
+
+    @classmethod
+    def from_ngos(cls, ngos, aspirational_districts):
+        """Encode NGO dicts (as returned by MatchingEngine.get_all_ngos)"""
+        states, districts = {}, {}
+        aspirational = set(aspirational_districts)
+        n = len(ngos)
+        arrays = {
+            'state': np.full(n, -1, dtype=np.int32),
+            'district': np.full(n, -1, dtype=np.int32),
+            'aspirational': np.zeros(n, dtype=np.bool_),
+            'compliant': np.zeros(n, dtype=np.bool_),
+            'sdgs': np.zeros((n, N_SDGS), dtype=np.bool_),
+        }
+        issue_codes = np.zeros(n, dtype=np.int32)
+        for i, ngo in enumerate(ngos):
+            state = (ngo.get('state') or '').lower()
+            district = (ngo.get('district') or '').lower()
+            if state:
+                arrays['state'][i] = states.setdefault(state, len(states))
+            if district:
+                arrays['district'][i] = districts.setdefault(district, len(districts))
+            arrays['aspirational'][i] = district in aspirational
+            codes = ngo.get('issue_codes')
+            if codes is None:
+                codes = features.ngo_issue_codes(ngo)
+            issue_codes[i] = codes
+            arrays['compliant'][i] = codes == 0
+            arrays['sdgs'][i, _sdg_columns(ngo.get('sdgs'))] = True
+        return cls(arrays, [ngo['darpan_id'] for ngo in ngos], states, districts, issue_codes)
+
+    def to_shared_memory(self):
+        """Copy the arrays into one shared memory block and return its spec for workers"""
+        size = sum(a.nbytes for a in self.arrays.values())
+        self._shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        spec, offset = [], 0
+        for name in NgoMatrix.FIELDS:
+            array = self.arrays[name]
+            view = np.ndarray(array.shape, dtype=array.dtype, buffer=self._shm.buf, offset=offset)
+            view[...] = array
+            spec.append((name, array.dtype.str, array.shape, offset))
+            offset += array.nbytes
+        return self._shm.name, spec
+
+    @classmethod
+    def attach(cls, shm_name, spec):
+        """Map a shared matrix created by to_shared_memory without copying it"""
+        shm = shared_memory.SharedMemory(name=shm_name)
+        arrays = {
+            name: np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf, offset=offset)
+            for name, dtype, shape, offset in spec
+        }
+        matrix = cls(arrays)
+        matrix._shm = shm
+        return matrix
+
+    def release(self, unlink=False):
+        if self._shm is not None:
+            self.arrays = {}
+            self._shm.close()
+            if unlink:
+                self._shm.unlink()
+            self._shm = None
+
+
+def encode_company(company, matrix):
+    """Encode a company's preferences against the NGO matrix vocabularies"""
+    locations = []
+    for location in company.get('preferred_geographies') or []:
+        state = (location.get('state') or '').lower()
+        district = (location.get('district') or '').lower()
+        # Codes of -2 never match an NGO, -1 means "not given"
+        locations.append((
+            matrix.states.get(state, -2) if state else -1,
+            matrix.districts.get(district, -2) if district else -1,
+        ))
+    return company['cin'], locations, _sdg_columns(company.get('sdgs'))
+
+
+def score_company(matrix, locations, sdg_columns):
+    """Vectorized calculate_match_score for one company against every NGO"""
+    n = len(matrix)
+    if locations:
+        proximity = np.full(n, 25.0)
+        decided = np.zeros(n, dtype=np.bool_)
+        # Same precedence as calculate_geographic_proximity: the first location
+        # decides via district, then state, then the aspirational district list
+        for state, district in locations:
+            for hit, value in (
+                (matrix.district == district if district >= 0 else None, 100.0),
+                (matrix.state == state if state >= 0 else None, 75.0),
+                (matrix.aspirational, 85.0),
+            ):
+                if hit is None:
+                    continue
+                hit = hit & ~decided
+                proximity[hit] = value
+                decided |= hit
+    else:
+        proximity = np.zeros(n)
+
+    if sdg_columns:
+        overlap = matrix.sdgs[:, sdg_columns].sum(axis=1)
+        sdg_alignment = 100.0 * overlap / len(sdg_columns)
+    else:
+        sdg_alignment = np.zeros(n)
+
+    score = PROXIMITY_WEIGHT * proximity + SDG_WEIGHT * sdg_alignment + COMPLIANCE_BONUS * matrix.compliant
+    return score, proximity, sdg_alignment
+
+
+def top_k(score, k):
+    """Indices of the k highest scores, best first"""
+    k = min(k, len(score))
+    if k <= 0:
+        return np.array([], dtype=np.int64)
+    best = np.argpartition(-score, k - 1)[:k]
+    return best[np.argsort(-score[best], kind='stable')]
+
+
+def ngo_labels(matrix):
+    """Per-NGO values for the matches table: darpan ID and JSON compliance columns"""
+    compliance, risks = [], []
+    for codes in matrix.issue_codes:
+        issues = list(features.describe_issues(int(codes)))
+        compliance.append(json.dumps({"is_compliant": not issues, "issues": issues}))
+        risks.append(json.dumps(issues))
+    return list(matrix.darpan_ids), compliance, risks
+
+
+_worker_matrix = None
+_worker_labels = None
+
+
+def _init_worker(shm_name, spec, labels):
+    global _worker_matrix, _worker_labels
+    _worker_matrix = NgoMatrix.attach(shm_name, spec)
+    _worker_labels = labels
+
+
+def _strengths(proximity, sdg_alignment):
+    strengths = []
+    if proximity >= 75:
+        strengths.append("Operates in preferred geography")
+    if sdg_alignment >= 50:
+        strengths.append("Strong SDG alignment")
+    return json.dumps(strengths)
+
+
+def _score_chunk(companies, k, created_at):
+    """Worker entry point: score a shard and return its CINs, ready-to-insert match rows and scoring time"""
+    started = time.perf_counter()
+    darpan_ids, compliance, risks = _worker_labels
+    cins, rows = [], []
+    for cin, locations, sdg_columns in companies:
+        score, proximity, sdg_alignment = score_company(_worker_matrix, locations, sdg_columns)
+        cins.append(cin)
+        for i in top_k(score, k):
+            rows.append((
+                cin, darpan_ids[i], round(float(score[i]), 2),
+                _strengths(proximity[i], sdg_alignment[i]),
+                compliance[i], risks[i], created_at
+            ))
+    return cins, rows, time.perf_counter() - started
+
+
+def _store_matches(conn, cins, rows):
+    conn.executemany("DELETE FROM matches WHERE company_cin = ?", [(cin,) for cin in cins])
+    conn.executemany('''
+    INSERT INTO matches
+    (company_cin, ngo_darpan_id, match_score, strengths, compliance_status, risk_factors, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', rows)
+    conn.commit()
+
+
+def run_batch_match(engine, top_k_per_company=10, workers=None, chunk_size=200, progress=None):
+    """Score every stored company against every NGO and replace their rows in matches"""
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+
+    ngos = engine.get_all_ngos()
+    companies = engine.get_all_companies()
+    matrix = NgoMatrix.from_ngos(ngos, engine.get_aspirational_districts())
+    encoded = [encode_company(company, matrix) for company in companies]
+    chunks = [encoded[i:i + chunk_size] for i in range(0, len(encoded), chunk_size)]
+    logger.info(f"Batch matching {len(companies)} companies against {len(ngos)} NGOs "
+                f"with {workers} workers in {len(chunks)} chunks")
+
+    done = 0
+    created_at = datetime.now().isoformat()
+    shm_name, spec = matrix.to_shared_memory()
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(shm_name, spec, ngo_labels(matrix))) as pool:
+            futures = [pool.submit(_score_chunk, chunk, top_k_per_company, created_at) for chunk in chunks]
+            for future in as_completed(futures):
+                cins, rows, seconds = future.result()
+                _store_matches(engine.conn, cins, rows)
+                CHUNK_SECONDS.observe(seconds)
+
+                done += len(cins)
+                COMPANIES_MATCHED.inc(len(cins))
+                rate = done / (time.perf_counter() - started)
+                logger.info(f"Matched {done}/{len(companies)} companies ({rate:.1f}/s)")
+                if progress:
+                    progress(done, len(companies), rate)
+    finally:
+        matrix.release(unlink=True)
+
+    elapsed = time.perf_counter() - started
+    logger.info(f"Batch matching finished: {done} companies in {elapsed:.1f}s")
+    return {'companies': done, 'ngos': len(ngos), 'seconds': elapsed,
+            'companies_per_second': done / elapsed if elapsed else 0.0}
@@ -0,0 +1,73 @@
+"""Import-time guard for the lightweight entry points.
+
+Imports each module in a fresh interpreter, fails if it takes longer than
+its budget or drags in one of the heavy scraping dependencies.
+
+    python bench_startup.py            # check against the budgets
+    python bench_startup.py --repeat 5 # best of 5 runs per module
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+# Modules must stay importable without loading any of these
+HEAVY_MODULES = ['pandas', 'selenium', 'geopy', 'fuzzywuzzy', 'bs4', 'dotenv', 'requests']
+
+# Budget in seconds per module, measured on top of a bare interpreter start
+BUDGETS = {
+    'metrics': 0.05,
+    'data_collect': 0.1,
+    'matching': 0.1,
+    'ingest': 0.1,
+    'cli': 0.1,
+    'features': 0.05,
+    'suggest': 0.05,
+    'archive': 0.1,
+    'scheduler': 0.1,
+    'enrichment': 0.1,
+    'reparse': 0.1,
+    # numpy is needed at import for the vector code, so these get more room
+    'semantic_index': 0.2,
+    'batch_match': 0.2,
+}
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'modules': sorted(sys.modules)}}))
+"""
+
+
+def measure(module, repeat):
+    best = None
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', PROBE.format(module=module)],
+                             capture_output=True, text=True, check=True)
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        if best is None or result['seconds'] < best['seconds']:
+            best = result
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    failures = 0
+    for module, budget in BUDGETS.items():
+        result = measure(module, args.repeat)
+        loaded = [m for m in HEAVY_MODULES if m in result['modules']]
+        ok = result['seconds'] <= budget and not loaded
+        failures += not ok
+        status = 'ok' if ok else 'FAIL'
+        extra = f" (loaded {', '.join(loaded)})" if loaded else ''
+        print(f"{status:4} {module:15} {result['seconds'] * 1000:7.1f} ms / {budget * 1000:.0f} ms{extra}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,174 @@
+"""Lightweight entry points for the CSR matchmaker.
+
+Each subcommand imports only what it needs, so e.g. `python cli.py match`
+never loads Selenium or pandas and `python cli.py serve` never opens SQLite.
+
+    python cli.py scrape darpan --state 27
+    python cli.py scrape csrbox --limit 50
+    python cli.py ingest data/ngo.json
+    python cli.py index data/ngo.json
+    python cli.py match L12345MH2000PLC000000 --top-k 5
+    python cli.py match-all --workers 8 --top-k 20
+    python cli.py reparse --output ./reparsed
+    python cli.py serve --port 5000
+"""
+import argparse
+import json
+import sys
+
+
+def cmd_scrape(args):
+    from data_collect import DataCollector
+
+    collector = DataCollector(cache_dir=args.cache_dir, db_path=args.db)
+    if args.source == 'darpan':
+        for state in args.state:
+            df = collector.fetch_ngo_darpan(state, force_refresh=args.force)
+            print(f"{state}: {0 if df is None else len(df)} NGOs")
+    elif args.source == 'csrbox':
+        df = collector.scrape_csr_box(limit=args.limit)
+        print(f"{len(df)} CSR Box projects")
+    elif args.source == 'guidestar':
+        results = collector.fetch_guidestar_ratings_batch(args.ids, concurrency=args.concurrency)
+        for ngo_id, data in results.items():
+            print(json.dumps({ngo_id: data}))
+    elif args.source == 'mca':
+        results = collector.fetch_mca_company_data_batch(args.ids, concurrency=args.concurrency)
+        for cin, data in results.items():
+            print(json.dumps({cin: data}))
+    return 0
+
+
+def cmd_ingest(args):
+    from data_collect import DataCollector
+    from ingest import ingest_ngo_json
+
+    collector = DataCollector(cache_dir=args.cache_dir, db_path=args.db)
+    count = ingest_ngo_json(collector, args.path)
+    print(f"Ingested {count} NGOs from {args.path}")
+    return 0
+
+
+def cmd_index(args):
+    from ingest import load_ngo_json
+    from semantic_index import SemanticIndex
+
+    index = SemanticIndex.build(load_ngo_json(args.path), n_components=args.components)
+    index.save(args.output)
+    print(f"Indexed {len(index.ids)} NGOs into {args.output}")
+    return 0
+
+
+def cmd_match(args):
+    from data_collect import DataCollector
+    from matching import MatchingEngine
+
+    engine = MatchingEngine(DataCollector(cache_dir=args.cache_dir, db_path=args.db))
+    if engine.get_company_by_cin(args.cin) is None:
+        print(f"No company found for CIN {args.cin}", file=sys.stderr)
+        return 1
+    matches = engine.find_matches(args.cin, top_k=args.top_k)
+    if not matches:
+        print("No NGOs stored yet, run `python cli.py ingest` first", file=sys.stderr)
+    for match in matches:
+        print(json.dumps(match))
+    return 0
+
+
+def cmd_match_all(args):
+    from batch_match import run_batch_match
+    from data_collect import DataCollector
+    from matching import MatchingEngine
+
+    def progress(done, total, rate):
+        print(f"\r{done}/{total} companies ({rate:.1f}/s)", end='', file=sys.stderr, flush=True)
+
+    engine = MatchingEngine(DataCollector(cache_dir=args.cache_dir, db_path=args.db))
+    summary = run_batch_match(engine, top_k_per_company=args.top_k, workers=args.workers,
+                              chunk_size=args.chunk_size, progress=progress)
+    print(file=sys.stderr)
+    print(json.dumps(summary))
+    return 0
+
+
+def cmd_reparse(args):
+    from data_collect import configure_logging
+    from reparse import reparse
+
+    configure_logging()
+    summary = reparse(args.archive, args.output, names=args.parser, workers=args.workers)
+    print(json.dumps(summary))
+    return 0
+
+
+def cmd_serve(args):
+    from app import app
+
+    app.run(host=args.host, port=args.port, debug=args.debug)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="CSR matchmaker tools")
+    parser.add_argument('--cache-dir', default='./cache')
+    parser.add_argument('--db', default='csr_matchmaker.db')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    scrape = sub.add_parser('scrape', help="Fetch data from an external source")
+    scrape_sub = scrape.add_subparsers(dest='source', required=True)
+    darpan = scrape_sub.add_parser('darpan', help="NGO Darpan portal")
+    darpan.add_argument('--state', action='append', required=True)
+    darpan.add_argument('--force', action='store_true', help="Ignore the cache")
+    csrbox = scrape_sub.add_parser('csrbox', help="CSR Box projects")
+    csrbox.add_argument('--limit', type=int, default=100)
+    guidestar = scrape_sub.add_parser('guidestar', help="GuideStar ratings")
+    mca = scrape_sub.add_parser('mca', help="MCA company data")
+    for batch in (guidestar, mca):
+        batch.add_argument('ids', nargs='+')
+        batch.add_argument('--concurrency', type=int, default=10)
+    scrape.set_defaults(func=cmd_scrape)
+
+    ingest = sub.add_parser('ingest', help="Load ngo.json into the database")
+    ingest.add_argument('path', nargs='?', default='data/ngo.json')
+    ingest.set_defaults(func=cmd_ingest)
+
+    index = sub.add_parser('index', help="Build the semantic search index for ngo.json")
+    index.add_argument('path', nargs='?', default='data/ngo.json')
+    index.add_argument('--output', default='data/ngo_index.npz')
+    index.add_argument('--components', type=int, default=128, help="LSA vector size")
+    index.set_defaults(func=cmd_index)
+
+    match = sub.add_parser('match', help="Rank NGOs for a company")
+    match.add_argument('cin')
+    match.add_argument('--top-k', type=int, default=10)
+    match.set_defaults(func=cmd_match)
+
+    match_all = sub.add_parser('match-all', help="Recompute matches for every company")
+    match_all.add_argument('--top-k', type=int, default=10)
+    match_all.add_argument('--workers', type=int, default=None, help="Defaults to the CPU count")
+    match_all.add_argument('--chunk-size', type=int, default=200, help="Companies per worker task")
+    match_all.set_defaults(func=cmd_match_all)
+
+    reparse = sub.add_parser('reparse', help="Rebuild scraped datasets from the page archive")
+    reparse.add_argument('--archive', default='./archive')
+    reparse.add_argument('--output', default='./reparsed')
+    reparse.add_argument('--parser', action='append', help="Only run these parsers (repeatable)")
+    reparse.add_argument('--workers', type=int, default=None, help="Defaults to the CPU count")
+    reparse.set_defaults(func=cmd_reparse)
+
+    serve = sub.add_parser('serve', help="Run the NGO directory web app")
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=5000)
+    serve.add_argument('--debug', action='store_true')
+    serve.set_defaults(func=cmd_serve)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
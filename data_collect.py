@@ -1,51 +1,182 @@
-import requests
-from bs4 import BeautifulSoup
-import pandas as pd
+# Heavy dependencies (pandas, requests, BeautifulSoup, Selenium, dotenv) are
+# imported inside the methods that use them so that importing this module and
+# constructing a DataCollector stay cheap for short CLI runs and workers.
 import json
 import os
 import time
-from datetime import datetime, timedelta
-from geopy.distance import geodesic
-from fuzzywuzzy import fuzz, process
+from datetime import datetime
+from functools import lru_cache
+from urllib.parse import quote
 import sqlite3
 import logging
-from dotenv import load_dotenv
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.support.ui import Select
-from selenium.webdriver.chrome.options import Options
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    filename='csr_matchmaker.log'
-)
+from features import ngo_issue_codes
+import metrics
+
 logger = logging.getLogger('csr_matchmaker')
 
-# Load environment variables
-load_dotenv()
-MCA_API_KEY = os.getenv('MCA_API_KEY')
-DARPAN_API_KEY = os.getenv('DARPAN_API_KEY')
+def configure_logging(filename='csr_matchmaker.log'):
+    """Send csr_matchmaker logs to the log file (no-op if logging is already configured)"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        filename=filename
+    )
+
+@lru_cache(maxsize=None)
+def get_api_key(name):
+    """Read an API key from the environment, loading .env on first use"""
+    from dotenv import load_dotenv
+    load_dotenv()
+    return os.getenv(name)
+
+# Enrichment API endpoints; override via the environment to point at a mock server
+GUIDESTAR_API_URL = os.getenv('GUIDESTAR_API_URL', 'https://www.guidestarindia.org/api/ngo')
+MCA_API_URL = os.getenv('MCA_API_URL', 'https://data.gov.in/api/mca/company')
+HTTP_TIMEOUT = 30  # seconds
+
+GUIDESTAR_CACHE_MAX_AGE = None  # never expires
+MCA_CACHE_MAX_AGE = 30 * 24 * 60 * 60  # 30 days
+
+FETCH_SECONDS = metrics.histogram(
+    'csr_fetch_seconds', 'Time spent in each DataCollector fetch method', ['source'])
+CACHE_REQUESTS = metrics.counter(
+    'csr_cache_requests_total', 'DataCollector cache lookups by source and result', ['source', 'result'])
+
+def parse_ngo_darpan_table(html):
+    """Extract NGO rows from an NGO Darpan search results page"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    table = soup.select_one('.ngo-table')
+    if table is None:
+        return []
+    
+    ngos = []
+    for row in table.find_all('tr')[1:]:  # Skip header
+        cols = row.find_all('td')
+        if len(cols) >= 6:
+            ngos.append({
+                'darpan_id': cols[0].get_text().strip(),
+                'name': cols[1].get_text().strip(),
+                'state': cols[2].get_text().strip(),
+                'district': cols[3].get_text().strip(),
+                'sector': cols[4].get_text().strip(),
+                'registration_no': cols[5].get_text().strip()
+            })
+    return ngos
+
+def parse_csr_box_page(html):
+    """Extract project cards from a CSR Box listing page"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    projects = []
+    for card in soup.select('.project-card'):
+        projects.append({
+            'title': card.select_one('.project-title').text.strip(),
+            'company': card.select_one('.company-name').text.strip(),
+            'focus_area': card.select_one('.focus-area').text.strip(),
+            'location': card.select_one('.location').text.strip(),
+            'budget': card.select_one('.budget').text.strip(),
+        })
+    return projects
 
 class DataCollector:
-    def __init__(self, cache_dir="./cache"):
+    def __init__(self, cache_dir="./cache", db_path='csr_matchmaker.db'):
+        configure_logging()
         self.cache_dir = cache_dir
+        self.db_path = db_path
         os.makedirs(cache_dir, exist_ok=True)
         logger.info(f"Initialized DataCollector with cache directory: {cache_dir}")
         
-        # Initialize database connection
-        self.conn = sqlite3.connect('csr_matchmaker.db')
-        logger.info("Connected to database: csr_matchmaker.db")
-        self.create_tables()
-        
-        # Initialize Selenium WebDriver
-        chrome_options = Options()
-        chrome_options.add_argument('--headless')
-        chrome_options.add_argument('--disable-gpu')
-        self.driver = webdriver.Chrome(options=chrome_options)
+        # The database connection, browser, HTTP session and scheduler are created on first use
+        self._conn = None
+        self._driver = None
+        self._session = None
+        self._scheduler = None
+
+    @property
+    def conn(self):
+        """SQLite connection, opened and migrated on first access"""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path)
+            logger.info(f"Connected to database: {self.db_path}")
+            self.create_tables()
+        return self._conn
+
+    @property
+    def driver(self):
+        """Headless Chrome WebDriver, launched on first access"""
+        if self._driver is None:
+            from selenium import webdriver
+            from selenium.webdriver.chrome.options import Options
+
+            chrome_options = Options()
+            chrome_options.add_argument('--headless')
+            chrome_options.add_argument('--disable-gpu')
+            self._driver = webdriver.Chrome(options=chrome_options)
+        return self._driver
+
+    @property
+    def session(self):
+        """Pooled requests session reused across API calls"""
+        if self._session is None:
+            import requests
+            self._session = requests.Session()
+        return self._session
+
+    @property
+    def scheduler(self):
+        """Host-aware rate limiter shared with every other scraper process"""
+        if self._scheduler is None:
+            from scheduler import get_scheduler
+            self._scheduler = get_scheduler()
+        return self._scheduler
+
+    def _archive_page(self, url, html, request_data=None):
+        """Store a browser-rendered page in the raw page archive"""
+        from archive import get_archive
+        page_archive = get_archive()
+        if page_archive is not None:
+            page_archive.store(url, html, 200, 'text/html', request_data=request_data)
+
+    def _cache_path(self, source, key):
+        """Cache file for one API record; IDs such as GJ/2020/0260170 contain slashes"""
+        safe_key = str(key).replace('/', '_')
+        return f"{self.cache_dir}/{source}_{safe_key}.json"
+
+    def _read_cache_batch(self, source, keys, max_age=None):
+        """Return {key: cached data} for every key with a fresh cache file, scanning the cache once"""
+        now = time.time()
+        fresh = set()
+        with os.scandir(self.cache_dir) as entries:
+            for entry in entries:
+                if entry.name.startswith(f"{source}_") and entry.name.endswith('.json'):
+                    if max_age is None or (now - entry.stat().st_mtime) < max_age:
+                        fresh.add(entry.name)
+
+        cached = {}
+        for key in keys:
+            cache_file = self._cache_path(source, key)
+            if os.path.basename(cache_file) in fresh:
+                with open(cache_file, 'r') as f:
+                    cached[key] = json.load(f)
+        return cached
+
+    def _write_cache_batch(self, source, records):
+        """Write {key: data} records to the cache"""
+        for key, data in records.items():
+            with open(self._cache_path(source, key), 'w') as f:
+                json.dump(data, f)
+
+    def close_driver(self):
+        """Quit the browser if one was launched"""
+        if self._driver is not None:
+            try:
+                self._driver.quit()
+            finally:
+                self._driver = None
         
     def create_tables(self):
         """Create necessary database tables if they don't exist"""
@@ -103,6 +234,24 @@ class DataCollector:
                 FOREIGN KEY (ngo_darpan_id) REFERENCES ngos (darpan_id)
             )
             ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_matches_company ON matches (company_cin)')
+            
+            # Precomputed NGO features (see features.py)
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS ngo_features (
+                darpan_id TEXT PRIMARY KEY,
+                compliance_flags INTEGER,
+                issue_codes INTEGER,
+                funding_by_year TEXT,
+                funding_total REAL,
+                registration_year INTEGER,
+                registration_age INTEGER,
+                member_count INTEGER,
+                credibility_score REAL,
+                last_updated TIMESTAMP,
+                FOREIGN KEY (darpan_id) REFERENCES ngos (darpan_id)
+            )
+            ''')
             
             self.conn.commit()
             logger.info("Database tables created/verified successfully")
@@ -110,34 +259,46 @@ class DataCollector:
             logger.error(f"Database error during table creation: {e}")
             raise
     
+    @FETCH_SECONDS.time(source='ngo_darpan')
     def fetch_ngo_darpan(self, state, force_refresh=False):
         """Fetch NGO data from NGO Darpan portal using web scraping"""
+        import pandas as pd
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import Select
+
         logger.info(f"Scraping NGO Darpan data for state: {state}")
         cache_file = f"{self.cache_dir}/ngo_darpan_{state}.csv"
         
         if not force_refresh and os.path.exists(cache_file):
             file_time = os.path.getmtime(cache_file)
             if (time.time() - file_time) < 7 * 24 * 60 * 60:
+                CACHE_REQUESTS.inc(source='ngo_darpan', result='hit')
                 return pd.read_csv(cache_file)
+        CACHE_REQUESTS.inc(source='ngo_darpan', result='miss')
 
         try:
             all_ngos = []
             base_url = "https://ngodarpan.gov.in/index.php/search/"
             
             # Initialize the browser session
+            # Every page load goes through the scheduler; waits are for the DOM, not fixed sleeps
+            self.scheduler.acquire(base_url)
             self.driver.get(base_url)
-            time.sleep(3)  # Wait for page load
+            wait = WebDriverWait(self.driver, 30)
+            wait.until(EC.presence_of_element_located((By.NAME, "state")))
             
             # Select state from dropdown
             state_select = Select(self.driver.find_element(By.NAME, "state"))
             state_select.select_by_value(str(state))
-            time.sleep(2)
             
             # Click search button
-            search_button = self.driver.find_element(By.ID, "searchbtn")
+            search_button = wait.until(EC.element_to_be_clickable((By.ID, "searchbtn")))
+            self.scheduler.acquire(base_url)
             search_button.click()
-            time.sleep(3)
             
+            page = 1
             while True:
                 try:
                     # Wait for table to load
@@ -145,23 +306,13 @@ class DataCollector:
                         EC.presence_of_element_located((By.CLASS_NAME, "ngo-table"))
                     )
                     
-                    # Extract data from current page
-                    rows = table.find_elements(By.TAG_NAME, "tr")[1:]  # Skip header
-                    if not rows:
+                    # Archive the page and extract data from it
+                    html = self.driver.page_source
+                    self._archive_page(self.driver.current_url, html, {'state': str(state), 'page': page})
+                    ngos = parse_ngo_darpan_table(html)
+                    if not ngos:
                         break
-                        
-                    for row in rows:
-                        cols = row.find_elements(By.TAG_NAME, "td")
-                        if len(cols) >= 6:
-                            ngo_data = {
-                                'darpan_id': cols[0].text.strip(),
-                                'name': cols[1].text.strip(),
-                                'state': cols[2].text.strip(),
-                                'district': cols[3].text.strip(),
-                                'sector': cols[4].text.strip(),
-                                'registration_no': cols[5].text.strip()
-                            }
-                            all_ngos.append(ngo_data)
+                    all_ngos.extend(ngos)
                     
                     logger.info(f"Scraped {len(all_ngos)} NGOs so far...")
                     
@@ -169,8 +320,10 @@ class DataCollector:
                     next_button = self.driver.find_element(By.CLASS_NAME, "next")
                     if "disabled" in next_button.get_attribute("class"):
                         break
+                    self.scheduler.acquire(base_url)
                     next_button.click()
-                    time.sleep(2)
+                    WebDriverWait(self.driver, 30).until(EC.staleness_of(table))
+                    page += 1
                     
                 except Exception as e:
                     logger.error(f"Error while scraping page: {str(e)}")
@@ -189,29 +342,32 @@ class DataCollector:
             return pd.DataFrame()
             
         finally:
-            self.driver.quit()
+            self.close_driver()
 
     def __del__(self):
         """Cleanup browser resources"""
         try:
-            self.driver.quit()
+            self.close_driver()
         except:
             pass
 
+    @FETCH_SECONDS.time(source='guidestar')
     def fetch_guidestar_ratings(self, ngo_id):
         """Fetch NGO credibility ratings from GuideStar India"""
         logger.info(f"Fetching GuideStar ratings for NGO ID: {ngo_id}")
-        cache_file = f"{self.cache_dir}/guidestar_{ngo_id}.json"
+        cache_file = self._cache_path('guidestar', ngo_id)
         
         if os.path.exists(cache_file):
             logger.info(f"Using cached GuideStar data for NGO ID: {ngo_id}")
+            CACHE_REQUESTS.inc(source='guidestar', result='hit')
             with open(cache_file, 'r') as f:
                 return json.load(f)
+        CACHE_REQUESTS.inc(source='guidestar', result='miss')
         
         try:
             # This is a placeholder - actual implementation would use GuideStar API
-            url = f"https://www.guidestarindia.org/api/ngo/{ngo_id}"
-            response = requests.get(url)
+            url = f"{GUIDESTAR_API_URL}/{quote(str(ngo_id), safe='')}"
+            response = self.scheduler.request('GET', url, session=self.session, timeout=HTTP_TIMEOUT)
             
             if response.status_code == 200:
                 data = response.json()
@@ -227,23 +383,26 @@ class DataCollector:
             logger.error(f"Error fetching GuideStar data for NGO ID: {ngo_id}: {str(e)}", exc_info=True)
             return {"credibility_score": None}
     
+    @FETCH_SECONDS.time(source='mca')
     def fetch_mca_company_data(self, cin):
         """Fetch company CSR data from MCA Portal"""
         logger.info(f"Fetching MCA company data for CIN: {cin}")
-        cache_file = f"{self.cache_dir}/mca_{cin}.json"
+        cache_file = self._cache_path('mca', cin)
         
         if os.path.exists(cache_file):
             file_time = os.path.getmtime(cache_file)
-            if (time.time() - file_time) < 30 * 24 * 60 * 60:  # 30 days
+            if (time.time() - file_time) < MCA_CACHE_MAX_AGE:
                 logger.info(f"Using cached MCA data for CIN: {cin}")
+                CACHE_REQUESTS.inc(source='mca', result='hit')
                 with open(cache_file, 'r') as f:
                     return json.load(f)
+        CACHE_REQUESTS.inc(source='mca', result='miss')
         
         try:
             # This is a placeholder - actual implementation would use MCA API
-            url = f"https://data.gov.in/api/mca/company/{cin}"
-            headers = {"Authorization": f"Bearer {MCA_API_KEY}"}
-            response = requests.get(url, headers=headers)
+            url = f"{MCA_API_URL}/{quote(str(cin), safe='')}"
+            headers = {"Authorization": f"Bearer {get_api_key('MCA_API_KEY')}"}
+            response = self.scheduler.request('GET', url, session=self.session, headers=headers, timeout=HTTP_TIMEOUT)
             
             if response.status_code == 200:
                 data = response.json()
@@ -259,8 +418,54 @@ class DataCollector:
             logger.error(f"Error fetching MCA data for CIN: {cin}: {str(e)}", exc_info=True)
             return {}
     
+    def _fetch_batch(self, source, keys, url_template, max_age, fallback, headers=None,
+                     concurrency=10, retries=3):
+        """Serve keys from the cache in bulk and fetch only the misses concurrently"""
+        from enrichment import fetch_json_batch
+
+        keys = list(dict.fromkeys(keys))
+        results = self._read_cache_batch(source, keys, max_age)
+        CACHE_REQUESTS.inc(len(results), source=source, result='hit')
+        misses = [key for key in keys if key not in results]
+        CACHE_REQUESTS.inc(len(misses), source=source, result='miss')
+        logger.info(f"{source} batch: {len(results)} cached, fetching {len(misses)}")
+
+        if misses:
+            fetched = fetch_json_batch(
+                # Darpan IDs contain '/', which must not become path separators
+                {key: url_template.format(key=quote(str(key), safe='')) for key in misses},
+                headers=headers, concurrency=concurrency, timeout=HTTP_TIMEOUT,
+                retries=retries, scheduler=self.scheduler
+            )
+            succeeded = {key: data for key, data in fetched.items() if data is not None}
+            self._write_cache_batch(source, succeeded)
+            logger.info(f"{source} batch: fetched {len(succeeded)}/{len(misses)} records")
+            for key in misses:
+                results[key] = succeeded.get(key, fallback())
+        return results
+    
+    @FETCH_SECONDS.time(source='guidestar_batch')
+    def fetch_guidestar_ratings_batch(self, ngo_ids, concurrency=10):
+        """Fetch GuideStar ratings for many NGOs, returning {ngo_id: data}"""
+        return self._fetch_batch(
+            'guidestar', ngo_ids, GUIDESTAR_API_URL + '/{key}', GUIDESTAR_CACHE_MAX_AGE,
+            lambda: {"credibility_score": None}, concurrency=concurrency
+        )
+    
+    @FETCH_SECONDS.time(source='mca_batch')
+    def fetch_mca_company_data_batch(self, cins, concurrency=10):
+        """Fetch MCA company data for many CINs, returning {cin: data}"""
+        headers = {"Authorization": f"Bearer {get_api_key('MCA_API_KEY')}"}
+        return self._fetch_batch(
+            'mca', cins, MCA_API_URL + '/{key}', MCA_CACHE_MAX_AGE,
+            dict, headers=headers, concurrency=concurrency
+        )
+    
+    @FETCH_SECONDS.time(source='csr_box')
     def scrape_csr_box(self, limit=100):
         """Scrape CSR Box for project data"""
+        import pandas as pd
+
         logger.info(f"Scraping CSR Box for project data (limit: {limit})")
         cache_file = f"{self.cache_dir}/csrbox_projects.csv"
         
@@ -268,32 +473,22 @@ class DataCollector:
             file_time = os.path.getmtime(cache_file)
             if (time.time() - file_time) < 14 * 24 * 60 * 60:  # 14 days
                 logger.info(f"Using cached CSR Box data from {cache_file}")
+                CACHE_REQUESTS.inc(source='csr_box', result='hit')
                 return pd.read_csv(cache_file)
+        CACHE_REQUESTS.inc(source='csr_box', result='miss')
         
         try:
             projects = []
             for page in range(1, 11):  # Scrape 10 pages
                 url = f"https://csrbox.org/India-CSR-projects?page={page}"
-                response = requests.get(url)
+                response = self.scheduler.request('GET', url, session=self.session, timeout=HTTP_TIMEOUT)
                 
                 if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    project_cards = soup.select('.project-card')
-                    
-                    for card in project_cards:
-                        project = {
-                            'title': card.select_one('.project-title').text.strip(),
-                            'company': card.select_one('.company-name').text.strip(),
-                            'focus_area': card.select_one('.focus-area').text.strip(),
-                            'location': card.select_one('.location').text.strip(),
-                            'budget': card.select_one('.budget').text.strip(),
-                        }
+                    for project in parse_csr_box_page(response.text):
                         projects.append(project)
                         
                         if len(projects) >= limit:
                             break
-                
-                time.sleep(2)  # Be respectful with scraping
             
             df = pd.DataFrame(projects)
             df.to_csv(cache_file, index=False)
@@ -378,6 +573,8 @@ class DataCollector:
                 logger.error(f"Error storing NGO {ngo.get('darpan_id')}: {e}")
                 error_count += 1
         
+        if stored_count and 'darpan_id' in ngo_data:
+            self.refresh_ngo_issue_codes(list(ngo_data['darpan_id']))
         self.conn.commit()
         logger.info(f"Stored {stored_count} NGO records successfully, {error_count} errors")
     
@@ -417,4 +614,54 @@ class DataCollector:
                 error_count += 1
         
         self.conn.commit()
-        logger.info(f"Stored {stored_count} company records successfully, {error_count} errors")
\ No newline at end of file
+        logger.info(f"Stored {stored_count} company records successfully, {error_count} errors")
+    
+    def refresh_ngo_issue_codes(self, darpan_ids, batch_size=500):
+        """Recompute stored issue codes and credibility scores from the current ngos rows"""
+        darpan_ids = list(dict.fromkeys(darpan_ids))
+        for i in range(0, len(darpan_ids), batch_size):
+            batch = darpan_ids[i:i + batch_size]
+            cursor = self.conn.execute(f'''
+            SELECT n.darpan_id, n.has_12a, n.has_80g, n.has_fcra, n.credibility_score, f.compliance_flags
+            FROM ngos n JOIN ngo_features f ON f.darpan_id = n.darpan_id
+            WHERE n.darpan_id IN ({', '.join('?' * len(batch))})
+            ''', batch)
+            columns = [desc[0] for desc in cursor.description]
+            updates = []
+            for row in cursor.fetchall():
+                ngo = dict(zip(columns, row))
+                updates.append((ngo_issue_codes(ngo), ngo['credibility_score'], ngo['darpan_id']))
+            self.conn.executemany(
+                'UPDATE ngo_features SET issue_codes = ?, credibility_score = ? WHERE darpan_id = ?', updates)
+    
+    def store_ngo_features(self, features):
+        """Store precomputed NGO feature records in the database"""
+        logger.info(f"Storing {len(features)} NGO feature records in database")
+        now = datetime.now().isoformat()
+        rows = [(
+            f['darpan_id'],
+            f['compliance_flags'],
+            f['issue_codes'],
+            json.dumps(f['funding_by_year']),
+            f['funding_total'],
+            f['registration_year'],
+            f['registration_age'],
+            f['member_count'],
+            f['credibility_score'],
+            now
+        ) for f in features]
+        
+        try:
+            self.conn.executemany('''
+            INSERT OR REPLACE INTO ngo_features
+            (darpan_id, compliance_flags, issue_codes, funding_by_year, funding_total,
+            registration_year, registration_age, member_count, credibility_score, last_updated)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+            self.refresh_ngo_issue_codes([f['darpan_id'] for f in features])
+            self.conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Error storing NGO features: {e}")
+            self.conn.rollback()
+            raise
+        logger.info(f"Stored {len(rows)} NGO feature records successfully")
@@ -1,11 +1,10 @@
-import requests
 from bs4 import BeautifulSoup
 import pandas as pd
-import time
-import random
 from tqdm import tqdm
 import re
 
+from scheduler import get_scheduler
+
 # Configure headers to mimic browser behavior
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
@@ -25,6 +24,7 @@ def scrape_ngo_darpan():
     base_url = "https://ngodarpan.gov.in/index.php/ajaxcontroller/get_ajxdata"
     
     all_ngos = []
+    scheduler = get_scheduler()
     
     for state_code, state_name in tqdm(INDIAN_STATES.items(), desc="Scraping States"):
         try:
@@ -34,28 +34,8 @@ def scrape_ngo_darpan():
                 'page': 0
             }
             
-            response = requests.post(base_url, headers=HEADERS, data=payload)
-            data = response.json()['data']
-            
-            for ngo in data:
-                # Extract key compliance parameters
-                ngo_data = {
-                    'darpan_id': ngo.get('darpan_id'),
-                    'name': ngo.get('organisation_name'),
-                    'state': state_name,
-                    'district': ngo.get('district_name'),
-                    'registration_type': ngo.get('registration_type'),
-                    'registration_date': pd.to_datetime(ngo.get('date_of_registration')),
-                    'sectors': clean_sectors(ngo.get('sector_name')),
-                    'fcra_status': 'Yes' in ngo.get('fcra_detail'),
-                    '12a_status': 'Yes' in ngo.get('12a'),
-                    '80g_status': 'Yes' in ngo.get('80g'),
-                    'contact': re.sub(r'\D', '', ngo.get('mobile'))[-10:],
-                    'website': validate_url(ngo.get('organisation_website'))
-                }
-                all_ngos.append(ngo_data)
-            
-            time.sleep(random.uniform(1, 3))  # Respect rate limits
+            response = scheduler.request('POST', base_url, headers=HEADERS, data=payload, timeout=60)
+            all_ngos.extend(parse_ngo_darpan_response(response.json(), state_name))
             
         except Exception as e:
             print(f"Error scraping {state_name}: {str(e)}")
@@ -63,6 +43,27 @@ def scrape_ngo_darpan():
     
     return pd.DataFrame(all_ngos)
 
+def parse_ngo_darpan_response(data: dict, state_name: str) -> list:
+    """Extract NGO records from an NGO Darpan get_ajxdata response"""
+    ngos = []
+    for ngo in data['data']:
+        # Extract key compliance parameters
+        ngos.append({
+            'darpan_id': ngo.get('darpan_id'),
+            'name': ngo.get('organisation_name'),
+            'state': state_name,
+            'district': ngo.get('district_name'),
+            'registration_type': ngo.get('registration_type'),
+            'registration_date': pd.to_datetime(ngo.get('date_of_registration')),
+            'sectors': clean_sectors(ngo.get('sector_name')),
+            'fcra_status': 'Yes' in ngo.get('fcra_detail'),
+            '12a_status': 'Yes' in ngo.get('12a'),
+            '80g_status': 'Yes' in ngo.get('80g'),
+            'contact': re.sub(r'\D', '', ngo.get('mobile'))[-10:],
+            'website': validate_url(ngo.get('organisation_website'))
+        })
+    return ngos
+
 def clean_sectors(raw_sectors: str) -> list:
     """Map NGO sectors to Schedule VII categories"""
     schedule_vii_mapping = {
@@ -89,9 +90,10 @@ def scrape_csr_projects():
     """Scrape CSR projects from CSR Box"""
     projects = []
     base_url = "https://csrbox.org/India-CSR-projects-list"
+    scheduler = get_scheduler()
     
     try:
-        response = requests.get(base_url, headers=HEADERS)
+        response = scheduler.request('GET', base_url, headers=HEADERS, timeout=60)
         soup = BeautifulSoup(response.content, 'html.parser')
         
         # Pagination handling
@@ -99,28 +101,30 @@ def scrape_csr_projects():
         
         for page in tqdm(range(1, pages+1), desc="Scraping CSR Projects"):
             page_url = f"{base_url}?page={page}"
-            page_response = requests.get(page_url, headers=HEADERS)
-            page_soup = BeautifulSoup(page_response.content, 'html.parser')
-            
-            for card in page_soup.find_all('div', class_='project-card'):
-                project = {
-                    'company': card.find('h3').text.strip(),
-                    'project_title': card.find('h4').text.strip(),
-                    'location': extract_location(card.find('p', class_='location').text),
-                    'sectors': [tag.text.strip() for tag in card.find_all('span', class_='sector-tag')],
-                    'budget': convert_budget(card.find('div', class_='budget').text),
-                    'duration': card.find('div', class_='duration').text,
-                    'sdgs': extract_sdgs(card.find('div', class_='sdgs').text)
-                }
-                projects.append(project)
-            
-            time.sleep(random.uniform(1.5, 4))
+            page_response = scheduler.request('GET', page_url, headers=HEADERS, timeout=60)
+            projects.extend(parse_csr_projects_page(page_response.content))
             
     except Exception as e:
         print(f"Error scraping CSR Box: {str(e)}")
     
     return pd.DataFrame(projects)
 
+def parse_csr_projects_page(html) -> list:
+    """Extract projects from one CSR Box project list page"""
+    soup = BeautifulSoup(html, 'html.parser')
+    projects = []
+    for card in soup.find_all('div', class_='project-card'):
+        projects.append({
+            'company': card.find('h3').text.strip(),
+            'project_title': card.find('h4').text.strip(),
+            'location': extract_location(card.find('p', class_='location').text),
+            'sectors': [tag.text.strip() for tag in card.find_all('span', class_='sector-tag')],
+            'budget': convert_budget(card.find('div', class_='budget').text),
+            'duration': card.find('div', class_='duration').text,
+            'sdgs': extract_sdgs(card.find('div', class_='sdgs').text)
+        })
+    return projects
+
 def extract_location(location_str: str) -> dict:
     """Extract state and district from location string"""
     parts = location_str.split(',')
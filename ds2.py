@@ -1,12 +1,12 @@
 import requests
 from bs4 import BeautifulSoup
 import pandas as pd
-import time
-import random
 from tqdm import tqdm
 import re
 import certifi
 
+from scheduler import get_scheduler
+
 # Updated headers with security tokens
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
@@ -29,6 +29,7 @@ def scrape_ngo_darpan():
     base_url = "https://ngodarpan.gov.in/index.php/ajaxcontroller/search_ngo"
     
     all_ngos = []
+    scheduler = get_scheduler()
     
     for state_code, state_name in tqdm(INDIAN_STATES.items(), desc="Scraping States"):
         try:
@@ -45,7 +46,7 @@ def scrape_ngo_darpan():
                 'view_type': 'view'
             }
             
-            response = requests.post(base_url, headers=HEADERS, data=payload)
+            response = scheduler.request('POST', base_url, headers=HEADERS, data=payload, timeout=60)
             
             # Check for valid JSON response
             try:
@@ -73,8 +74,6 @@ def scrape_ngo_darpan():
                 }
                 all_ngos.append(ngo_data)
             
-            time.sleep(random.uniform(2, 5))  # Increased delay
-            
         except Exception as e:
             print(f"Error scraping {state_name}: {str(e)}")
             continue
@@ -88,7 +87,7 @@ def scrape_csr_projects():
     
     try:
         # Use certifi's CA bundle
-        response = requests.get(base_url, headers=HEADERS, verify=certifi.where())
+        response = get_scheduler().request('GET', base_url, headers=HEADERS, verify=certifi.where(), timeout=60)
         soup = BeautifulSoup(response.content, 'html.parser')
         
         # Rest of the scraping logic remains same
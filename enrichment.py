@@ -0,0 +1,73 @@
+"""Concurrent JSON fetching for bulk enrichment lookups (GuideStar, MCA).
+
+aiohttp is imported on first use so this module stays cheap to import.
+"""
+import asyncio
+import json
+import logging
+
+from archive import get_archive
+from scheduler import RETRY_STATUSES, get_scheduler
+
+logger = logging.getLogger('csr_matchmaker')
+
+
+async def _fetch_one(session, scheduler, slots, key, url, headers, retries):
+    async with slots:
+        return await _fetch_one_unbounded(session, scheduler, key, url, headers, retries)
+
+
+async def _fetch_one_unbounded(session, scheduler, key, url, headers, retries):
+    import aiohttp
+
+    for attempt in range(retries + 1):
+        # The scheduler spaces requests per host and holds back after 429/5xx
+        await scheduler.acquire_async(url)
+        try:
+            async with session.get(url, headers=headers) as response:
+                await scheduler.record_async(url, response.status, response.headers.get('Retry-After'))
+                if response.status == 200:
+                    body = await response.read()
+                    page_archive = get_archive()
+                    if page_archive is not None:
+                        # Compression and the archive's SQLite lock stay off the event loop
+                        await asyncio.to_thread(page_archive.store, url, body, response.status,
+                                                response.headers.get('Content-Type'))
+                    return key, json.loads(body)
+                if response.status not in RETRY_STATUSES:
+                    logger.error(f"Failed to fetch {url}, HTTP {response.status}")
+                    return key, None
+                logger.warning(f"HTTP {response.status} for {url} (attempt {attempt + 1}/{retries + 1})")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            await scheduler.record_async(url, None)
+            logger.warning(f"Error fetching {url} (attempt {attempt + 1}/{retries + 1}): {e!r}")
+        except ValueError as e:
+            logger.error(f"Invalid JSON from {url}: {e!r}")
+            return key, None
+
+    logger.error(f"Giving up on {url} after {retries + 1} attempts")
+    return key, None
+
+
+async def afetch_json_batch(urls, headers=None, concurrency=10, timeout=30, retries=3, scheduler=None):
+    """Fetch {key: url} concurrently and return {key: parsed JSON or None}"""
+    import aiohttp
+
+    if not urls:
+        return {}
+    scheduler = scheduler or get_scheduler()
+    # Only reserve rate-limit slots for requests that can start right away
+    slots = asyncio.Semaphore(concurrency)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    async with aiohttp.ClientSession(connector=connector, timeout=client_timeout) as session:
+        results = await asyncio.gather(*(
+            _fetch_one(session, scheduler, slots, key, url, headers, retries)
+            for key, url in urls.items()
+        ))
+    return dict(results)
+
+
+def fetch_json_batch(urls, headers=None, concurrency=10, timeout=30, retries=3, scheduler=None):
+    """Blocking wrapper around afetch_json_batch for synchronous callers"""
+    return asyncio.run(afetch_json_batch(urls, headers, concurrency, timeout, retries, scheduler))
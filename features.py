@@ -0,0 +1,134 @@
+"""Per-NGO feature records computed once at ingest time.
+
+Matching reads these integers instead of re-deriving compliance from the
+raw ngo.json fields on every request. The stored compliance bitmask only
+holds what ngo.json records (FCRA, certificates, foreign funds); the stored
+issue codes combine it with the ngos row's 12A/80G/CSR-1 flags and
+credibility score (see ngo_issue_codes) and are recomputed whenever either
+table is written.
+"""
+import re
+from datetime import date, datetime
+from functools import lru_cache
+
+# Compliance bitmask
+HAS_12A = 1 << 0
+HAS_80G = 1 << 1
+HAS_FCRA = 1 << 2
+HAS_CSR1 = 1 << 3
+HAS_REGISTRATION_CERTIFICATE = 1 << 4
+HAS_PAN = 1 << 5
+FOREIGN_FUNDS = 1 << 6
+
+# Issue codes, in the order MatchingEngine.verify_compliance has always reported them
+MISSING_12A = 1 << 0
+MISSING_80G = 1 << 1
+MISSING_CSR1 = 1 << 2
+MISSING_FCRA_FOR_FOREIGN_FUNDS = 1 << 3
+LOW_CREDIBILITY = 1 << 4
+
+ISSUE_MESSAGES = (
+    (MISSING_12A, "Missing 12A registration"),
+    (MISSING_80G, "Missing 80G registration"),
+    (MISSING_CSR1, "Missing CSR-1 registration"),
+    (MISSING_FCRA_FOR_FOREIGN_FUNDS, "Missing FCRA registration for foreign funds"),
+    (LOW_CREDIBILITY, "Low credibility score"),
+)
+
+MIN_CREDIBILITY_SCORE = 3
+
+
+def compliance_flags(ngo):
+    """Bitmask from the has_* flags of an ngos row (or an ngo.json derived record)"""
+    flags = 0
+    for key, bit in (('has_12a', HAS_12A), ('has_80g', HAS_80G), ('has_fcra', HAS_FCRA),
+                     ('has_csr1', HAS_CSR1), ('works_with_foreign_funds', FOREIGN_FUNDS)):
+        if ngo.get(key):
+            flags |= bit
+    return flags
+
+
+def issue_codes(flags, credibility_score):
+    """Compliance issue bitmask for a compliance bitmask and credibility score"""
+    codes = 0
+    if not flags & HAS_12A:
+        codes |= MISSING_12A
+    if not flags & HAS_80G:
+        codes |= MISSING_80G
+    if not flags & HAS_CSR1:
+        codes |= MISSING_CSR1
+    if flags & FOREIGN_FUNDS and not flags & HAS_FCRA:
+        codes |= MISSING_FCRA_FOR_FOREIGN_FUNDS
+    if (credibility_score or 0) < MIN_CREDIBILITY_SCORE:
+        codes |= LOW_CREDIBILITY
+    return codes
+
+
+def ngo_issue_codes(ngo):
+    """Issue bitmask for an ngos row joined with its ngo_features compliance_flags"""
+    flags = compliance_flags(ngo) | (ngo.get('compliance_flags') or 0)
+    return issue_codes(flags, ngo.get('credibility_score'))
+
+
+@lru_cache(maxsize=None)
+def describe_issues(codes):
+    """Human-readable messages for an issue bitmask"""
+    return tuple(message for bit, message in ISSUE_MESSAGES if codes & bit)
+
+
+def parse_amount(value):
+    """Rupee amount from a 'Amount Sanctioned' string, or None if not specified"""
+    digits = re.sub(r'[^\d.]', '', str(value or ''))
+    try:
+        return float(digits) if digits else None
+    except ValueError:
+        return None
+
+
+def parse_registration_date(value):
+    """Parse the DD-MM-YYYY 'Date of Registration' field"""
+    try:
+        return datetime.strptime((value or '').strip(), '%d-%m-%Y').date()
+    except ValueError:
+        return None
+
+
+def extract_features(ngo, credibility_score=None, today=None):
+    """Compute the feature record for one ngo.json entry"""
+    today = today or date.today()
+    registration = ngo.get('Registration Details') or {}
+    funds = ngo.get('Source of Funds') or []
+
+    flags = 0
+    if any(f.get('FCRA Available') == 'Available' for f in ngo.get('FCRA details') or []):
+        flags |= HAS_FCRA
+    if registration.get('Copy of Registration Certificate') == 'Available':
+        flags |= HAS_REGISTRATION_CERTIFICATE
+    if registration.get('Copy of Pan Card') == 'Available':
+        flags |= HAS_PAN
+    if any(f.get('Source') == 'Overseas' for f in funds):
+        flags |= FOREIGN_FUNDS
+
+    funding_by_year = {}
+    for fund in funds:
+        amount = parse_amount(fund.get('Amount Sanctioned'))
+        year = fund.get('Finacial Year')
+        if amount is not None and year:
+            funding_by_year[year] = funding_by_year.get(year, 0) + amount
+
+    registered = parse_registration_date(registration.get('Date of Registration'))
+    registration_age = None
+    if registered:
+        registration_age = today.year - registered.year - ((today.month, today.day) < (registered.month, registered.day))
+
+    return {
+        'darpan_id': ngo.get('Unique Id of VO/NGO'),
+        'compliance_flags': flags,
+        'issue_codes': issue_codes(flags, credibility_score),
+        'funding_by_year': dict(sorted(funding_by_year.items())),
+        'funding_total': sum(funding_by_year.values()),
+        'registration_year': registered.year if registered else None,
+        'registration_age': registration_age,
+        'member_count': len(ngo.get('Members') or []),
+        'credibility_score': credibility_score,
+    }
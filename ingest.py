@@ -0,0 +1,79 @@
+import json
+import logging
+
+from features import HAS_FCRA, extract_features
+
+logger = logging.getLogger('csr_matchmaker')
+
+NOT_AVAILABLE = ('', 'Not Available', 'Not Specified', 'NOT AVAILABLE')
+
+def load_ngo_json(path='data/ngo.json'):
+    """Load the scraped NGO Darpan dataset"""
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def parse_districts(districts_str):
+    """Split an 'STATE->D1, D2, STATE2->D3' string into unique (state, district) pairs
+
+    A district without its own 'STATE->' prefix belongs to the last state named:
+
+    >>> parse_districts('GUJARAT->Anand  , RAJASTHAN->Jaipur , Kota')
+    [('GUJARAT', 'Anand'), ('RAJASTHAN', 'Jaipur'), ('RAJASTHAN', 'Kota')]
+    """
+    pairs = []
+    if not districts_str or districts_str in NOT_AVAILABLE:
+        return pairs
+    state = None
+    for d in districts_str.split(','):
+        if '->' in d:
+            state, d = d.split('->', 1)
+            state = state.strip()
+        dist = d.strip()
+        if state and dist and (state, dist) not in pairs:
+            pairs.append((state, dist))
+    return pairs
+
+def ngo_json_to_record(ngo, features=None):
+    """Convert one ngo.json entry into a row for the ngos table"""
+    features = features or extract_features(ngo)
+    registration = ngo.get('Registration Details') or {}
+    key_issues = ngo.get('Key Issues') or {}
+    contact = ngo.get('Contact Details') or {}
+
+    issues = key_issues.get('Key Issues', '')
+    focus_areas = [i.strip() for i in issues.split(',') if i.strip()] if issues not in NOT_AVAILABLE else []
+    districts = parse_districts(key_issues.get('Operational Area-District'))
+
+    return {
+        'darpan_id': ngo.get('Unique Id of VO/NGO'),
+        'name': ngo.get('name'),
+        'state': contact.get('State') or registration.get('State of Registration'),
+        'district': districts[0][1] if districts else None,
+        'pincode': None,
+        'focus_areas': focus_areas,
+        'sdgs': [],
+        'schedule_vii_categories': [],
+        'has_12a': False,
+        'has_80g': False,
+        'has_fcra': bool(features['compliance_flags'] & HAS_FCRA),
+        'annual_budget': None,
+        'csr_funds_utilized': None,
+        'credibility_score': None,
+    }
+
+def ingest_ngo_json(collector, path='data/ngo.json'):
+    """Load ngo.json into the collector's ngos and ngo_features tables"""
+    import pandas as pd
+
+    ngos = load_ngo_json(path)
+    logger.info(f"Ingesting {len(ngos)} NGOs from {path}")
+    records, features = [], []
+    for ngo in ngos:
+        if not ngo.get('Unique Id of VO/NGO'):
+            continue
+        feature = extract_features(ngo)
+        records.append(ngo_json_to_record(ngo, feature))
+        features.append(feature)
+    collector.store_ngo_data(pd.DataFrame(records))
+    collector.store_ngo_features(features)
+    return len(records)
@@ -1,20 +1,63 @@
 import json
 
+import features
+import metrics
+
+# Timed once per call, not per NGO: the per-NGO scoring steps are too cheap to wrap
+SCORING_SECONDS = metrics.histogram(
+    'csr_matching_seconds', 'Time spent in each MatchingEngine operation', ['step'])
+NGOS_SCORED = metrics.counter(
+    'csr_matching_ngos_scored_total', 'NGOs scored against a company by find_matches')
+
+# NGO rows joined with their precomputed features; feature columns are NULL until ingest computes them
+NGO_QUERY = '''
+    SELECT n.*, f.compliance_flags, f.issue_codes, f.funding_total,
+           f.registration_age, f.member_count
+    FROM ngos n LEFT JOIN ngo_features f ON f.darpan_id = n.darpan_id
+'''
+
+# Ranking policy for calculate_match_score (also used by batch_match).
+# A match scores out of 100:
+#   PROXIMITY_WEIGHT * geographic proximity (0-100, see calculate_geographic_proximity)
+#   + SDG_WEIGHT * SDG alignment (0-100, share of the company's SDGs the NGO covers)
+#   + COMPLIANCE_BONUS if verify_compliance finds no issues
+# Geography and SDG fit count equally and compliance acts as a tie-breaker
+# rather than a filter. These are provisional defaults, not calibrated
+# against real CSR decisions; changing them changes every ranking and the
+# rows written to matches by `cli.py match-all`.
+PROXIMITY_WEIGHT = 0.4
+SDG_WEIGHT = 0.4
+COMPLIANCE_BONUS = 20
+
 class MatchingEngine:
     def __init__(self, data_collector):
         self.data_collector = data_collector
-        self.conn = data_collector.conn
+
+    @property
+    def conn(self):
+        """Shared database connection, opened lazily by the data collector"""
+        return self.data_collector.conn
     
     def get_ngo_by_id(self, darpan_id):
         """Retrieve NGO data from database by Darpan ID"""
         cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM ngos WHERE darpan_id = ?", (darpan_id,))
+        cursor.execute(NGO_QUERY + " WHERE n.darpan_id = ?", (darpan_id,))
         row = cursor.fetchone()
         
         if not row:
             return None
             
         columns = [desc[0] for desc in cursor.description]
+        return self._parse_ngo_row(columns, row)
+    
+    def get_all_ngos(self):
+        """Retrieve every NGO with its precomputed features in a single query"""
+        cursor = self.conn.cursor()
+        cursor.execute(NGO_QUERY)
+        columns = [desc[0] for desc in cursor.description]
+        return [self._parse_ngo_row(columns, row) for row in cursor.fetchall()]
+    
+    def _parse_ngo_row(self, columns, row):
         ngo = dict(zip(columns, row))
         
         # Parse JSON fields
@@ -34,6 +77,16 @@ class MatchingEngine:
             return None
             
         columns = [desc[0] for desc in cursor.description]
+        return self._parse_company_row(columns, row)
+    
+    def get_all_companies(self):
+        """Retrieve every company in a single query"""
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT * FROM companies")
+        columns = [desc[0] for desc in cursor.description]
+        return [self._parse_company_row(columns, row) for row in cursor.fetchall()]
+    
+    def _parse_company_row(self, columns, row):
         company = dict(zip(columns, row))
         
         # Parse JSON fields
@@ -45,33 +98,17 @@ class MatchingEngine:
     
     def verify_compliance(self, ngo):
         """Check MCA-mandated requirements for NGOs"""
-        compliance_status = {
-            "is_compliant": False,
-            "issues": []
-        }
-        
-        # Check for required registrations
-        if not ngo.get('has_12a'):
-            compliance_status["issues"].append("Missing 12A registration")
+        # Checks: 12A, 80G, CSR-1 (required since 2021), FCRA when working with
+        # foreign funds, and a minimum credibility score. The codes are stored with
+        # the NGO's features; derive them only for NGOs without features.
+        codes = ngo.get('issue_codes')
+        if codes is None:
+            codes = features.ngo_issue_codes(ngo)
         
-        if not ngo.get('has_80g'):
-            compliance_status["issues"].append("Missing 80G registration")
-        
-        # Check for CSR-1 registration (required since 2021)
-        # This would typically be checked via API, but we're simulating here
-        if not ngo.get('has_csr1', False):
-            compliance_status["issues"].append("Missing CSR-1 registration")
-        
-        # Check for FCRA if working with foreign funds
-        if not ngo.get('has_fcra') and ngo.get('works_with_foreign_funds', False):
-            compliance_status["issues"].append("Missing FCRA registration for foreign funds")
-        
-        # Check credibility score
-        if ngo.get('credibility_score', 0) < 3:
-            compliance_status["issues"].append("Low credibility score")
-        
-        compliance_status["is_compliant"] = len(compliance_status["issues"]) == 0
-        return compliance_status
+        return {
+            "is_compliant": codes == 0,
+            "issues": list(features.describe_issues(codes))
+        }
     
     def calculate_geographic_proximity(self, company_locations, ngo_location):
         """Calculate geographic proximity score between company and NGO"""
@@ -123,4 +160,55 @@ class MatchingEngine:
             
         # Convert to sets for intersection calculation
         company_sdg_set = set(company_sdgs)
-        ngo_sdg_set = set(ngo_sdgs)
\ No newline at end of file
+        ngo_sdg_set = set(ngo_sdgs)
+        
+        # Share of the company's SDGs that the NGO also works on
+        return 100 * len(company_sdg_set & ngo_sdg_set) / len(company_sdg_set)
+    
+    def calculate_match_score(self, company, ngo):
+        """Combine proximity, SDG alignment and compliance into a 0-100 score"""
+        proximity = self.calculate_geographic_proximity(
+            company.get('preferred_geographies') or [],
+            {'state': ngo.get('state') or '', 'district': ngo.get('district') or ''}
+        )
+        sdg_alignment = self.calculate_sdg_alignment(company.get('sdgs'), ngo.get('sdgs'))
+        compliance = self.verify_compliance(ngo)
+        
+        score = (PROXIMITY_WEIGHT * proximity + SDG_WEIGHT * sdg_alignment
+                 + (COMPLIANCE_BONUS if compliance["is_compliant"] else 0))
+        strengths = []
+        if proximity >= 75:
+            strengths.append("Operates in preferred geography")
+        if sdg_alignment >= 50:
+            strengths.append("Strong SDG alignment")
+        
+        return {
+            "ngo_darpan_id": ngo.get('darpan_id'),
+            "match_score": round(score, 2),
+            "strengths": strengths,
+            "compliance_status": compliance,
+            "risk_factors": compliance["issues"]
+        }
+    
+    def find_similar_ngos(self, project_description, top_k=10, index_path='data/ngo_index.npz'):
+        """Return [(darpan_id, similarity)] for NGOs whose work best fits a CSR project description"""
+        from semantic_index import get_index
+        
+        index = get_index(index_path)
+        if index is None:
+            return []
+        with SCORING_SECONDS.time(step='semantic_similarity'):
+            return index.query(project_description, top_k=top_k)
+    
+    @SCORING_SECONDS.time(step='find_matches')
+    def find_matches(self, cin, top_k=10):
+        """Rank all stored NGOs for a company and return the top_k matches"""
+        company = self.get_company_by_cin(cin)
+        if not company:
+            return []
+        
+        matches = [self.calculate_match_score(company, ngo) for ngo in self.get_all_ngos()]
+        NGOS_SCORED.inc(len(matches))
+        
+        matches.sort(key=lambda m: m["match_score"], reverse=True)
+        return matches[:top_k]
@@ -0,0 +1,104 @@
+"""Re-derive scraped datasets from the page archive with the current parsers.
+
+After fixing a parser, run
+
+    python cli.py reparse --output ./reparsed --workers 8
+
+to replay the newest archived copy of every page through it in parallel and
+write one CSV per parser, without touching the network.
+"""
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+logger = logging.getLogger('csr_matchmaker')
+
+
+def _parse_ngo_darpan_api(body, fetch):
+    import ds
+
+    payload = json.loads(fetch['request_data'] or '{}')
+    state_id = payload.get('state_id')
+    return ds.parse_ngo_darpan_response(json.loads(body), ds.INDIAN_STATES.get(state_id, state_id))
+
+
+def _parse_ngo_darpan_portal(body, fetch):
+    from data_collect import parse_ngo_darpan_table
+    return parse_ngo_darpan_table(body.decode('utf-8', errors='replace'))
+
+
+def _parse_csr_projects(body, fetch):
+    import ds
+    return ds.parse_csr_projects_page(body)
+
+
+def _parse_csr_box(body, fetch):
+    from data_collect import parse_csr_box_page
+    return parse_csr_box_page(body.decode('utf-8', errors='replace'))
+
+
+# name -> (URL prefix of the archived fetches, parser taking (body bytes, fetch record))
+PARSERS = {
+    'ngo_darpan_api': ('https://ngodarpan.gov.in/index.php/ajaxcontroller/get_ajxdata', _parse_ngo_darpan_api),
+    'ngo_darpan_portal': ('https://ngodarpan.gov.in/index.php/search', _parse_ngo_darpan_portal),
+    'csr_projects': ('https://csrbox.org/India-CSR-projects-list?page=', _parse_csr_projects),
+    'csr_box': ('https://csrbox.org/India-CSR-projects?page=', _parse_csr_box),
+}
+
+_worker_archive = None
+
+
+def _init_worker(archive_root):
+    global _worker_archive
+    from archive import PageArchive
+    _worker_archive = PageArchive(archive_root)
+
+
+def _parse_chunk(name, fetches):
+    """Worker entry point: run one parser over a chunk of archived fetches"""
+    parser = PARSERS[name][1]
+    rows, errors = [], 0
+    for fetch in fetches:
+        try:
+            rows.extend(parser(_worker_archive.get(fetch['sha256']), fetch))
+        except Exception as e:
+            errors += 1
+            logger.error(f"Reparse {name} failed for {fetch['url']} ({fetch['sha256'][:12]}): {e!r}")
+    return name, rows, errors
+
+
+def reparse(archive_root, output_dir, names=None, workers=None, chunk_size=50):
+    """Parse the newest archived copy of every page and write <output_dir>/<parser>.csv"""
+    import pandas as pd
+    from archive import PageArchive
+
+    started = time.perf_counter()
+    archive = PageArchive(archive_root)
+    names = names or list(PARSERS)
+    tasks = []
+    for name in names:
+        prefix = PARSERS[name][0]
+        fetches = [f for f in archive.fetches(prefix) if f['status'] == 200]
+        logger.info(f"Reparse {name}: {len(fetches)} archived pages")
+        tasks.extend((name, fetches[i:i + chunk_size]) for i in range(0, len(fetches), chunk_size))
+
+    rows = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(archive_root,)) as pool:
+        futures = [pool.submit(_parse_chunk, name, chunk) for name, chunk in tasks]
+        for future in as_completed(futures):
+            name, chunk_rows, chunk_errors = future.result()
+            rows[name].extend(chunk_rows)
+            errors[name] += chunk_errors
+
+    os.makedirs(output_dir, exist_ok=True)
+    summary = {}
+    for name in names:
+        path = os.path.join(output_dir, f"{name}.csv")
+        pd.DataFrame(rows[name]).to_csv(path, index=False)
+        summary[name] = {'rows': len(rows[name]), 'errors': errors[name], 'path': path}
+        logger.info(f"Reparse {name}: wrote {len(rows[name])} rows to {path}, {errors[name]} errors")
+    summary['seconds'] = time.perf_counter() - started
+    return summary
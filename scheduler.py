@@ -0,0 +1,218 @@
+"""Shared politeness scheduler for all outbound scraping and API calls.
+
+Every host gets a token bucket whose state lives in a small SQLite file, so
+all scraper processes on the machine draw from the same budget. Callers
+reserve a slot before each request (waiting if the bucket is empty) and
+report the response afterwards:
+
+- 429 and 5xx responses halve the host's rate and block the host until the
+  Retry-After time, or an exponential backoff if the header is missing
+- successful responses raise the rate back towards its configured maximum
+
+    scheduler = get_scheduler()
+    response = scheduler.request('GET', url, session=session, timeout=30)
+"""
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+logger = logging.getLogger('csr_matchmaker')
+
+DEFAULT_DB_PATH = os.getenv('CSR_RATELIMIT_DB', './cache/ratelimits.db')
+
+# Maximum requests per second per host; hosts not listed get DEFAULT_RATE
+HOST_RATES = {
+    'ngodarpan.gov.in': 0.5,
+    'csrbox.org': 0.5,
+    'www.guidestarindia.org': 5.0,
+    'data.gov.in': 5.0,
+}
+DEFAULT_RATE = 1.0
+BURST = 1.0  # tokens a bucket can hold, i.e. requests allowed back to back after idling
+
+MIN_RATE_FRACTION = 1 / 32  # adaptive backoff never drops below this share of the max rate
+RECOVERY_FRACTION = 0.1  # share of the max rate regained per successful response
+MAX_BACKOFF = 300  # seconds
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def host_of(url):
+    return urlsplit(url).hostname or ''
+
+
+def parse_retry_after(value, now=None):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - (now or time.time()), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class HostScheduler:
+    """Per-host token buckets shared between processes through SQLite"""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, host_rates=None, default_rate=DEFAULT_RATE, burst=BURST):
+        self.db_path = db_path
+        self.host_rates = dict(HOST_RATES if host_rates is None else host_rates)
+        self.default_rate = default_rate
+        self.burst = burst
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.conn = sqlite3.connect(db_path, timeout=60, isolation_level=None, check_same_thread=False)
+        # The connection is shared by every thread using this scheduler
+        self._lock = threading.Lock()
+        self.conn.execute('''
+        CREATE TABLE IF NOT EXISTS host_buckets (
+            host TEXT PRIMARY KEY,
+            rate REAL,
+            tokens REAL,
+            updated REAL,
+            blocked_until REAL,
+            failures INTEGER
+        )
+        ''')
+
+    def max_rate(self, host):
+        return self.host_rates.get(host, self.default_rate)
+
+    def _transaction(self, host, update):
+        """Run update(state) on the host's bucket under an exclusive lock and persist the result"""
+        with self._lock:
+            return self._locked_transaction(host, update)
+
+    def _locked_transaction(self, host, update):
+        now = time.time()
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = self.conn.execute(
+                'SELECT rate, tokens, updated, blocked_until, failures FROM host_buckets WHERE host = ?',
+                (host,)
+            ).fetchone()
+            if row is None:
+                row = (self.max_rate(host), self.burst, now, 0.0, 0)
+            state = dict(zip(('rate', 'tokens', 'updated', 'blocked_until', 'failures'), row))
+            # Never run faster than the configured maximum, even if it was lowered since
+            state['rate'] = min(state['rate'], self.max_rate(host))
+            result = update(state, now)
+            self.conn.execute(
+                'INSERT OR REPLACE INTO host_buckets VALUES (?, ?, ?, ?, ?, ?)',
+                (host, state['rate'], state['tokens'], state['updated'], state['blocked_until'], state['failures'])
+            )
+            self.conn.execute('COMMIT')
+        except BaseException:
+            self.conn.execute('ROLLBACK')
+            raise
+        return result
+
+    def reserve(self, url):
+        """Take a token for url's host and return how many seconds to wait before sending"""
+        def update(state, now):
+            start = max(now, state['blocked_until'])
+            state['tokens'] = min(self.burst, state['tokens'] + (now - state['updated']) * state['rate'])
+            state['updated'] = now
+            # Tokens may go negative: each caller reserves the next free slot in order
+            state['tokens'] -= 1
+            wait = -state['tokens'] / state['rate'] if state['tokens'] < 0 else 0.0
+            return max(start - now, wait)
+
+        return self._transaction(host_of(url), update)
+
+    def blocked_for(self, url):
+        """Seconds until url's host may be contacted again after a backoff"""
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT blocked_until FROM host_buckets WHERE host = ?', (host_of(url),)
+            ).fetchone()
+        return max(row[0] - time.time(), 0.0) if row else 0.0
+
+    def acquire(self, url):
+        """Block until a request to url is allowed"""
+        delay = self.reserve(url)
+        # A backoff may have started while this caller was waiting for its slot
+        while delay > 0:
+            time.sleep(delay)
+            delay = self.blocked_for(url)
+
+    async def acquire_async(self, url):
+        """Wait, without blocking the event loop, until a request to url is allowed"""
+        # SQLite may wait on another process's lock, so keep it off the event loop
+        delay = await asyncio.to_thread(self.reserve, url)
+        while delay > 0:
+            await asyncio.sleep(delay)
+            delay = await asyncio.to_thread(self.blocked_for, url)
+
+    def record(self, url, status, retry_after=None):
+        """Adapt the host's rate to a response status (None for a connection error)"""
+        host = host_of(url)
+
+        def update(state, now):
+            max_rate = self.max_rate(host)
+            if status is None or status in RETRY_STATUSES:
+                state['failures'] += 1
+                state['rate'] = max(state['rate'] / 2, max_rate * MIN_RATE_FRACTION)
+                delay = parse_retry_after(retry_after, now)
+                if delay is None:
+                    delay = min(2 ** state['failures'], MAX_BACKOFF)
+                state['blocked_until'] = max(state['blocked_until'], now + delay)
+                return delay
+            state['failures'] = 0
+            state['rate'] = min(max_rate, state['rate'] + max_rate * RECOVERY_FRACTION)
+            return 0.0
+
+        delay = self._transaction(host, update)
+        if delay:
+            logger.warning(f"Backing off {host} for {delay:.1f}s after {status or 'connection error'}")
+
+    async def record_async(self, url, status, retry_after=None):
+        """record() run in a worker thread for event-loop callers"""
+        await asyncio.to_thread(self.record, url, status, retry_after)
+
+    def request(self, method, url, session=None, retries=3, archive=True, **kwargs):
+        """Send a rate-limited HTTP request, retrying 429/5xx responses and connection errors.
+
+        The final response body is stored in the page archive unless archive is False.
+        """
+        import requests
+
+        session = session or requests
+        for attempt in range(retries + 1):
+            self.acquire(url)
+            try:
+                response = session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                self.record(url, None)
+                if attempt == retries:
+                    raise
+                continue
+            self.record(url, response.status_code, response.headers.get('Retry-After'))
+            if response.status_code not in RETRY_STATUSES or attempt == retries:
+                break
+        if archive:
+            from archive import get_archive
+            page_archive = get_archive()
+            if page_archive is not None:
+                page_archive.store_response(response, kwargs.get('data') or kwargs.get('json'))
+        return response
+
+
+_schedulers = {}
+
+
+def get_scheduler(db_path=DEFAULT_DB_PATH):
+    """Process-wide scheduler for the given state file"""
+    key = (os.getpid(), db_path)
+    if key not in _schedulers:
+        _schedulers[key] = HostScheduler(db_path)
+    return _schedulers[key]
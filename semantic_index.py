@@ -0,0 +1,157 @@
+"""Approximate semantic search over NGO achievements and key issues.
+
+Built offline (`python cli.py index`): the text of each NGO is turned into a
+sparse TF-IDF vector, reduced with truncated SVD (LSA) to a small dense
+vector and stored in an IVF index (k-means coarse clusters with inverted
+lists) in a single .npz file next to the dataset. Querying only needs numpy,
+so the web app never loads scikit-learn.
+"""
+import logging
+import math
+import os
+import re
+from collections import Counter
+
+import numpy as np
+
+logger = logging.getLogger('csr_matchmaker')
+
+DEFAULT_INDEX_PATH = 'data/ngo_index.npz'
+TOKEN_PATTERN = re.compile(r"(?u)\b\w\w+\b")
+NOT_AVAILABLE = ('Not Available', 'NOT AVAILABLE', 'Not Specified')
+
+
+def ngo_text(ngo):
+    """Text that describes what an NGO does"""
+    parts = [ngo.get('Details of Achievements') or '']
+    key_issues = ngo.get('Key Issues') or {}
+    parts.append(key_issues.get('Key Issues') or '')
+    return ' '.join(p for p in parts if p not in NOT_AVAILABLE)
+
+
+def _normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return matrix / norms
+
+
+def _kmeans(vectors, n_clusters, iterations=20, seed=0):
+    """Spherical k-means on unit vectors, returns (centroids, assignments)"""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), n_clusters, replace=False)]
+    for _ in range(iterations):
+        assignments = np.argmax(vectors @ centroids.T, axis=1)
+        for c in range(n_clusters):
+            members = vectors[assignments == c]
+            if len(members):
+                centroids[c] = members.sum(axis=0)
+        centroids = _normalize_rows(centroids)
+    return centroids, np.argmax(vectors @ centroids.T, axis=1)
+
+
+class SemanticIndex:
+    """TF-IDF/LSA vectors in an inverted-file index for top-k cosine search"""
+
+    def __init__(self, ids, vocabulary, idf, components, vectors, centroids, list_offsets, list_members):
+        self.ids = ids
+        self.vocabulary = {str(term): i for i, term in enumerate(vocabulary)}
+        self.idf = idf
+        self.components = components
+        self.vectors = vectors
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.list_members = list_members
+
+    @classmethod
+    def build(cls, ngos, n_components=128, n_lists=None):
+        """Vectorize NGO texts and build the index (needs scikit-learn)"""
+        from sklearn.decomposition import TruncatedSVD
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        ids, texts = [], []
+        for ngo in ngos:
+            text = ngo_text(ngo)
+            if ngo.get('Unique Id of VO/NGO') and text:
+                ids.append(ngo['Unique Id of VO/NGO'])
+                texts.append(text)
+        logger.info(f"Building semantic index over {len(texts)} NGOs")
+
+        vectorizer = TfidfVectorizer(token_pattern=TOKEN_PATTERN.pattern, stop_words='english',
+                                     sublinear_tf=True, dtype=np.float32)
+        tfidf = vectorizer.fit_transform(texts)
+        n_components = max(1, min(n_components, tfidf.shape[1] - 1, len(texts) - 1))
+        svd = TruncatedSVD(n_components=n_components, random_state=0)
+        vectors = _normalize_rows(svd.fit_transform(tfidf)).astype(np.float32)
+
+        n_lists = n_lists or max(1, int(math.sqrt(len(vectors))))
+        centroids, assignments = _kmeans(vectors, min(n_lists, len(vectors)))
+        order = np.argsort(assignments, kind='stable')
+        list_offsets = np.searchsorted(assignments[order], np.arange(len(centroids) + 1))
+
+        return cls(
+            np.array(ids), vectorizer.get_feature_names_out(), vectorizer.idf_.astype(np.float32),
+            svd.components_.astype(np.float32), vectors, centroids.astype(np.float32),
+            list_offsets, order
+        )
+
+    def save(self, path=DEFAULT_INDEX_PATH):
+        vocabulary = sorted(self.vocabulary, key=self.vocabulary.get)
+        np.savez_compressed(
+            path, ids=self.ids, vocabulary=np.array(vocabulary), idf=self.idf,
+            components=self.components, vectors=self.vectors, centroids=self.centroids,
+            list_offsets=self.list_offsets, list_members=self.list_members
+        )
+        logger.info(f"Saved semantic index with {len(self.ids)} NGOs to {path}")
+
+    @classmethod
+    def load(cls, path=DEFAULT_INDEX_PATH):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(**{name: data[name] for name in data.files})
+
+    def embed(self, text):
+        """Project free text into the index's vector space"""
+        counts = Counter(t for t in TOKEN_PATTERN.findall(text.lower()) if t in self.vocabulary)
+        if not counts:
+            return None
+        columns = np.fromiter((self.vocabulary[t] for t in counts), dtype=np.int64)
+        weights = np.fromiter((1 + math.log(c) for c in counts.values()), dtype=np.float32)
+        weights *= self.idf[columns]
+        weights /= np.linalg.norm(weights)
+        vector = self.components[:, columns] @ weights
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def query(self, text, top_k=10, n_probe=4):
+        """Return [(ngo_id, similarity)] for the top_k NGOs closest to text"""
+        vector = self.embed(text)
+        if vector is None:
+            return []
+        probe = np.argsort(self.centroids @ vector)[::-1][:n_probe]
+        candidates = np.concatenate([
+            self.list_members[self.list_offsets[c]:self.list_offsets[c + 1]] for c in probe
+        ])
+        if not len(candidates):
+            return []
+        scores = self.vectors[candidates] @ vector
+        best = np.argsort(scores)[::-1][:top_k]
+        return [(str(self.ids[candidates[i]]), float(scores[i])) for i in best]
+
+
+_loaded = {}
+_missing = set()
+
+
+def get_index(path=DEFAULT_INDEX_PATH):
+    """Load an index once per file version, or return None if it has not been built"""
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        if path not in _missing:
+            _missing.add(path)
+            logger.warning(f"Semantic index {path} not found, run `python cli.py index` to build it")
+        return None
+    _missing.discard(path)
+    cached = _loaded.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = _loaded[path] = (mtime, SemanticIndex.load(path))
+    return cached[1]
@@ -0,0 +1,88 @@
+"""Prefix suggestions for NGO names, registration IDs and districts.
+
+Every searchable string is normalized and, for names, indexed at each word
+so "seva" finds "Shri Manu Seva Sangh". The keys live in one sorted list;
+a lookup bisects to the range sharing the prefix and returns the most
+popular entries in it. Districts are ranked by how many NGOs operate there,
+NGOs by how many districts they cover.
+"""
+import heapq
+import os
+import re
+import unicodedata
+from bisect import bisect_left
+
+from ingest import parse_districts
+
+KINDS = ('name', 'id', 'district')
+_NON_WORD = re.compile(r'[^\w/]+')
+
+
+def normalize(text):
+    """Lowercase, strip accents and punctuation, collapse whitespace"""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return ' '.join(_NON_WORD.sub(' ', text.lower()).split())
+
+
+class SuggestIndex:
+    """Sorted (key, entry) arrays searched with bisect"""
+
+    def __init__(self, ngos):
+        district_counts = {}
+        for ngo in ngos:
+            seen = set()
+            for _, district in parse_districts((ngo.get('Key Issues') or {}).get('Operational Area-District')):
+                if district and district not in seen:
+                    seen.add(district)
+                    district_counts[district] = district_counts.get(district, 0) + 1
+
+        entries = []  # (key, -popularity, kind, label, value)
+        for district, count in district_counts.items():
+            entries.append((normalize(district), -count, 'district', district, district))
+        for ngo in ngos:
+            name = (ngo.get('name') or '').strip()
+            ngo_id = ngo.get('Unique Id of VO/NGO') or ''
+            reach = len(parse_districts((ngo.get('Key Issues') or {}).get('Operational Area-District')))
+            words = normalize(name).split()
+            for i in range(len(words)):
+                entries.append((' '.join(words[i:]), -reach, 'name', name, name))
+            if ngo_id:
+                entries.append((normalize(ngo_id), -reach, 'id', f"{ngo_id} - {name}", ngo_id))
+
+        entries.sort()
+        self.keys = [entry[0] for entry in entries]
+        self.entries = entries
+
+    def suggest(self, prefix, limit=10, kinds=KINDS):
+        """Top `limit` suggestions whose key starts with prefix, most popular first"""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        start = bisect_left(self.keys, prefix)
+        end = bisect_left(self.keys, prefix + '\U0010ffff', lo=start)
+        candidates = (e for e in self.entries[start:end] if e[2] in kinds)
+
+        results, seen = [], set()
+        # Ties on popularity fall back to the shortest, then alphabetical, label
+        for _, _, kind, label, value in heapq.nsmallest(
+                limit * 4, candidates, key=lambda e: (e[1], len(e[3]), e[3])):
+            if (kind, value) not in seen:
+                seen.add((kind, value))
+                results.append({'kind': kind, 'label': label, 'value': value})
+                if len(results) == limit:
+                    break
+        return results
+
+
+_indexes = {}
+
+
+def get_suggest_index(path, ngos_loader):
+    """SuggestIndex for the dataset at path, rebuilt only when the file changes"""
+    stat = os.stat(path)
+    version = (stat.st_mtime_ns, stat.st_size)
+    cached = _indexes.get(path)
+    if cached is None or cached[0] != version:
+        cached = _indexes[path] = (version, SuggestIndex(ngos_loader()))
+    return cached[1]